@@ -12,12 +12,18 @@ Prerequisites:
   • pip install -r requirements.txt
 """
 
+import io
 import os
 import sys
 import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta, datetime, timezone
+from pathlib import Path
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 # ────────────────────────────────────────────────────────────────────────────────
 # Config
@@ -27,20 +33,38 @@ LOOKBEHIND_DAYS = 15                          # past earnings window
 LOOKAHEAD_DAYS  = 15                          # upcoming earnings window
 MAX_REQUEST_ATTEMPTS = 3
 RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+SHARD_DAYS = 7                                # days per Finnhub request
+FETCH_WORKERS = 4                             # shards fetched concurrently
+CACHE_DIR = Path(".cache")                    # raw Finnhub responses
+CACHE_TTL_SECONDS = 3600                      # reuse a response for 1 hour
+# Response validator header -> request header for conditional re-fetches
+CONDITIONAL_HEADERS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
 
 TODAY = date.today()
 FROM = (TODAY - timedelta(days=LOOKBEHIND_DAYS)).isoformat()
 TO   = (TODAY + timedelta(days=LOOKAHEAD_DAYS)).isoformat()
+_ONE_DAY = timedelta(days=1)
+
+# Shared session so repeated calls reuse the keep-alive connection.
+# Only finnhub.io is contacted: one host pool holding a socket per worker.
+# Retries stay in _fetch_shard so each one is logged.
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FETCH_WORKERS)
+_session = requests.Session()
+_session.mount("https://", _adapter)
 
 # ────────────────────────────────────────────────────────────────────────────────
 # Helpers
+class ConfigError(RuntimeError):
+    """Required configuration (e.g. FINNHUB_TOKEN) is missing."""
+
+
 def fmt_number(num):
     """
     Abbreviate big numbers with B/M.
     e.g. 1_234_567_890 -> '1.23 B', 456_000_000 -> '456 M'
     Returns '-' if value is None/invalid/zero.
     """
-    if num in (None, 0, "0"):
+    if num is None or num == 0 or num == "0":
         return "-"
     try:
         n = float(num)
@@ -53,16 +77,76 @@ def fmt_number(num):
     return f"{n:.0f}"
 
 
+def date_shards(start: str, end: str, days: int = SHARD_DAYS) -> list[tuple[str, str]]:
+    """Split the inclusive [start, end] range into consecutive <= `days` chunks."""
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    step = timedelta(days=days - 1)
+    shards = []
+    while first <= last:
+        shard_end = min(first + step, last)
+        shards.append((first.isoformat(), shard_end.isoformat()))
+        first = shard_end + _ONE_DAY
+    return shards
+
+
 def fetch_earnings() -> list[dict]:
-    """Call Finnhub and return raw earnings list."""
+    """
+    Call Finnhub and return raw earnings list for FROM..TO.
+    The window is split into SHARD_DAYS shards that are fetched concurrently
+    over the shared session; 429s are retried per shard like any other call.
+    """
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        results = list(ex.map(lambda shard: _fetch_shard(*shard), date_shards(FROM, TO)))
+    return [rec for shard in results for rec in shard]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write `data` to `path` via a temp file so readers never see a partial file."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _fetch_shard(start: str, end: str) -> list[dict]:
+    """
+    Fetch one date range from Finnhub.
+    A cached response is reused for CACHE_TTL_SECONDS; after that it is
+    revalidated with ETag/Last-Modified and kept if Finnhub answers 304.
+    """
+    cache_path = CACHE_DIR / f"earnings-{start}-{end}.json"
+    meta_path = cache_path.with_suffix(".meta.json")
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < CACHE_TTL_SECONDS:
+        return orjson.loads(cache_path.read_bytes()).get("earningsCalendar", [])
+
     if not TOKEN:
-        raise RuntimeError("FINNHUB_TOKEN env-var is missing.")
-    params = {"from": FROM, "to": TO, "token": TOKEN}
+        raise ConfigError("FINNHUB_TOKEN env-var is missing.")
+    params = {"from": start, "to": end, "token": TOKEN}
+    headers = {}
+    if cache_path.exists() and meta_path.exists():
+        validators = orjson.loads(meta_path.read_bytes())
+        headers = {
+            CONDITIONAL_HEADERS[name]: value
+            for name, value in validators.items()
+            if name in CONDITIONAL_HEADERS
+        }
     for attempt in range(1, MAX_REQUEST_ATTEMPTS + 1):
         try:
-            resp = requests.get(API, params=params, timeout=30)
+            resp = _session.get(API, params=params, headers=headers, timeout=30)
             resp.raise_for_status()
-            return resp.json().get("earningsCalendar", [])
+            if resp.status_code == 304:
+                cache_path.touch()            # unchanged: restart the TTL
+                return orjson.loads(cache_path.read_bytes()).get("earningsCalendar", [])
+            payload = orjson.loads(resp.content)
+            # Validators must never outlive the body they describe, so drop the
+            # old ones first and only write the new ones once the body landed.
+            CACHE_DIR.mkdir(exist_ok=True)
+            meta_path.unlink(missing_ok=True)
+            _write_atomic(cache_path, resp.content)
+            validators = {
+                name: resp.headers[name] for name in CONDITIONAL_HEADERS if name in resp.headers
+            }
+            _write_atomic(meta_path, orjson.dumps(validators))
+            return payload.get("earningsCalendar", [])
         except requests.exceptions.RequestException as exc:
             status_code = exc.response.status_code if exc.response is not None else None
             retryable = isinstance(
@@ -80,34 +164,51 @@ def fetch_earnings() -> list[dict]:
     raise RuntimeError("Finnhub request retry loop exited unexpectedly.")
 
 
+def _ymd(d: date) -> str:
+    """Format a date as YYYYMMDD (iCalendar DATE value) without strftime."""
+    return f"{d.year:04d}{d.month:02d}{d.day:02d}"
+
+
+_ICS_ESCAPE = str.maketrans({"\\": "\\\\", ";": r"\;", ",": r"\,", "\n": r"\n"})
+_UID_SUFFIX = "@earning-calendar-ics"
+_HEADER_LINES = (
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    "PRODID:-//earning-calendar-ics//EN",
+    "CALSCALE:GREGORIAN",
+    "METHOD:PUBLISH",
+    "X-WR-CALNAME:Earnings Calendar",
+)
+
+
 def escape_ics_text(value: str) -> str:
     """Escape text according to RFC5545."""
-    return (
-        value.replace("\\", "\\\\")
-        .replace(";", r"\;")
-        .replace(",", r"\,")
-        .replace("\n", r"\n")
-    )
+    return value.translate(_ICS_ESCAPE)
 
 
-def fold_ics_line(line: str, width: int = 75) -> list[str]:
-    """Fold long iCalendar lines (continuation starts with one space)."""
-    if len(line) <= width:
-        return [line]
-    folded = [line[:width]]
-    rest = line[width:]
-    while rest:
-        folded.append(f" {rest[: width - 1]}")
-        rest = rest[width - 1 :]
-    return folded
+def fold_ics_line(line: bytes, width: int = 75) -> Iterator[bytes]:
+    """
+    Fold long iCalendar lines (continuation starts with one space).
+    RFC5545 limits lines to `width` octets, so folding is done on the UTF-8
+    bytes and never splits a multi-byte character.
+    """
+    prefix = b""
+    while len(prefix) + len(line) > width:
+        cut = width - len(prefix)
+        while line[cut] & 0xC0 == 0x80:       # UTF-8 continuation byte
+            cut -= 1
+        yield prefix + line[:cut]
+        line = line[cut:]
+        prefix = b" "
+    yield prefix + line
 
 
 def to_event_lines(item: dict, dtstamp: str) -> list[str]:
     """Convert one Finnhub record into RFC5545 VEVENT lines."""
     symbol = item.get("symbol", "UNKNOWN")
-    event_date = datetime.fromisoformat(item["date"]).date()
-    end_date = event_date + timedelta(days=1)  # all-day events use exclusive end
-    uid = f"{symbol}-{event_date.isoformat()}@earning-calendar-ics"
+    event_date = date.fromisoformat(item["date"])
+    end_date = event_date + _ONE_DAY  # all-day events use exclusive end
+    uid = f"{symbol}-{event_date.isoformat()}{_UID_SUFFIX}"
 
     description = "\n".join(
         [
@@ -123,38 +224,34 @@ def to_event_lines(item: dict, dtstamp: str) -> list[str]:
         "BEGIN:VEVENT",
         f"UID:{escape_ics_text(uid)}",
         f"DTSTAMP:{dtstamp}",
-        f"DTSTART;VALUE=DATE:{event_date.strftime('%Y%m%d')}",
-        f"DTEND;VALUE=DATE:{end_date.strftime('%Y%m%d')}",
+        f"DTSTART;VALUE=DATE:{_ymd(event_date)}",
+        f"DTEND;VALUE=DATE:{_ymd(end_date)}",
         f"SUMMARY:{escape_ics_text(f'{symbol} Earnings')}",
         f"DESCRIPTION:{escape_ics_text(description)}",
         "END:VEVENT",
     ]
 
 
-def build_calendar(records: list[dict]) -> str:
-    """Build a full iCalendar payload with all records."""
+def build_calendar(records: Iterable[dict]) -> bytes:
+    """Build a full UTF-8 encoded iCalendar payload with all records."""
     dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//earning-calendar-ics//EN",
-        "CALSCALE:GREGORIAN",
-        "METHOD:PUBLISH",
-        "X-WR-CALNAME:Earnings Calendar",
-    ]
+    buf = io.BytesIO()
 
-    for rec in sorted(records, key=lambda r: (r.get("date", ""), r.get("symbol", ""))):
-        if not rec.get("date"):
-            continue
-        lines.extend(to_event_lines(rec, dtstamp))
+    def emit(lines: Iterable[str]) -> None:
+        for line in lines:
+            for folded in fold_ics_line(line.encode("utf-8")):
+                buf.write(folded)
+                buf.write(b"\r\n")
 
-    lines.append("END:VCALENDAR")
+    emit(_HEADER_LINES)
 
-    folded_lines: list[str] = []
-    for line in lines:
-        folded_lines.extend(fold_ics_line(line))
+    dated = [r for r in records if r.get("date")]
+    dated.sort(key=lambda r: (r["date"], r.get("symbol", "")))
+    for rec in dated:
+        emit(to_event_lines(rec, dtstamp))
 
-    return "\r\n".join(folded_lines) + "\r\n"
+    emit(["END:VCALENDAR"])
+    return buf.getvalue()
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -162,14 +259,22 @@ def main() -> None:
     records = fetch_earnings()
 
     out_path = "earnings_calendar.ics"
-    with open(out_path, "w", encoding="utf-8") as f:
+    with open(out_path, "wb", buffering=1 << 16) as f:
         f.write(build_calendar(records))
     print(f"✅  Calendar refreshed ({len(records)} events) → {out_path}")
 
 
 if __name__ == "__main__":
+    # Expected failures get a one-line message and a distinct exit code;
+    # anything else keeps the default traceback.
     try:
         main()
-    except Exception as exc:
-        print("💥  Script failed:", exc)
-        sys.exit(1)
+    except requests.HTTPError as exc:
+        print("💥  Finnhub HTTP error:", exc)
+        sys.exit(2)
+    except (requests.ConnectionError, requests.Timeout) as exc:
+        print("💥  Network error:", exc)
+        sys.exit(3)
+    except ConfigError as exc:
+        print("💥  Config error:", exc)
+        sys.exit(4)